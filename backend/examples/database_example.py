@@ -13,6 +13,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 
 from init_db import init_database
+from database import ScopedSession
 from db_helpers import (
     create_syllabus_with_session,
     get_all_syllabi_with_session,
@@ -31,18 +32,21 @@ def main():
     # Create sample data
     sample_assignments = [
         Assignment(
+            id=0,
             name="Midterm Exam",
             due_date=date(2025, 10, 10),
             due_time="10:00 AM",
             submission_link="https://example.com/midterm"
         ),
         Assignment(
+            id=0,
             name="Final Project",
             due_date=date(2024, 5, 10),
             due_time="11:59 PM",
             submission_link="https://example.com/final-project"
         ),
         Assignment(
+            id=0,
             name="Homework 1",
             due_date=date(2024, 2, 20),
             due_time="11:59 PM",
@@ -51,28 +55,34 @@ def main():
     ]
     
     sample_syllabus = Syllabus(
+        id=0,
         class_name="Advanced Computer Science",
         course_code="CS-401",
         assignments=sample_assignments
     )
     
-    print("Creating syllabus...")
-    created_syllabus = create_syllabus_with_session(sample_syllabus)
-    print(f"Created syllabus with ID: {created_syllabus.id}")
+    # Open this thread's scoped session so the *_with_session helpers below share it
+    ScopedSession()
+    try:
+        print("Creating syllabus...")
+        created_syllabus = create_syllabus_with_session(sample_syllabus)
+        print(f"Created syllabus with ID: {created_syllabus.id}")
     
-    print("\nRetrieving all syllabi...")
-    all_syllabi = get_all_syllabi_with_session()
-    for syllabus in all_syllabi:
-        print(f"- {syllabus.course_code}: {syllabus.class_name}")
+        print("\nRetrieving all syllabi...")
+        all_syllabi = get_all_syllabi_with_session()
+        for syllabus in all_syllabi:
+            print(f"- {syllabus.course_code}: {syllabus.class_name}")
     
-    print("\nSearching for specific course...")
-    found_syllabus = get_syllabus_by_course_code_with_session(sample_syllabus.course_code)
-    if found_syllabus:
-        pydantic_syllabus = db_syllabus_to_pydantic(found_syllabus)
-        print(f"Found: {pydantic_syllabus.class_name}")
-        print("Assignments:")
-        for assignment in pydantic_syllabus.assignments:
-            print(f"  - {assignment.name} (Due: {assignment.due_date} at {assignment.due_time})")
+        print("\nSearching for specific course...")
+        found_syllabus = get_syllabus_by_course_code_with_session(sample_syllabus.course_code)
+        if found_syllabus:
+            pydantic_syllabus = db_syllabus_to_pydantic(found_syllabus)
+            print(f"Found: {pydantic_syllabus.class_name}")
+            print("Assignments:")
+            for assignment in pydantic_syllabus.assignments:
+                print(f"  - {assignment.name} (Due: {assignment.due_date} at {assignment.due_time})")
+    finally:
+        ScopedSession.remove()
     
     print("\nGetting upcoming assignments...")
     with get_db_session() as db:
@@ -39,13 +39,13 @@ def example_syllabus_extraction():
         
         # Example: Convert to JSON
         print("\n--- JSON Output ---")
-        json_output = json.dumps(syllabus_data.model_dump(), indent=2, default=str)
+        json_output = json.dumps(syllabus_data.model_dump(mode="json"), indent=2)
         print(json_output[:500] + "..." if len(json_output) > 500 else json_output)
         
         # Example: Save to file
         print("\n--- Saving to File ---")
         with open("example_syllabus_output.json", "w", encoding="utf-8") as f:
-            json.dump(syllabus_data.model_dump(), f, indent=2, default=str)
+            json.dump(syllabus_data.model_dump(mode="json"), f, indent=2)
         print("✅ Saved to example_syllabus_output.json")
         
     else:
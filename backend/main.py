@@ -3,6 +3,7 @@
 Main entry point for the Syllabus Analyzer FastAPI application.
 """
 
+import os
 import uvicorn
 from src.api import app
 
@@ -12,7 +13,10 @@ def main():
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True  # Enable auto-reload for development
+        reload=os.getenv("DEV") == "1",  # Auto-reload only in development
+        loop=os.getenv("UVICORN_LOOP", "auto"),
+        http=os.getenv("UVICORN_HTTP", "auto"),
+        workers=int(os.getenv("WEB_CONCURRENCY", "1"))
     )
 
 if __name__ == "__main__":
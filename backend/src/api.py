@@ -4,12 +4,18 @@ FastAPI application for PDF syllabus analysis.
 Provides REST API endpoints for uploading and analyzing PDF syllabi.
 """
 
+import asyncio
+import hashlib
 import os
 import tempfile
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Optional
 from fastapi import FastAPI, File, UploadFile, HTTPException, Body
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 
 # Add current src directory to path
 import sys
@@ -22,11 +28,20 @@ from path_utils import setup_shared_paths
 setup_shared_paths()
 
 from custom_types import Syllabus
-from pdf_analyzer import extract_syllabus_structure
+from pdf_analyzer import extract_syllabus_structure, ExtractionCache
 from database import create_tables
-from db_helpers import get_db_session, upsert_syllabus, get_all_syllabi_with_session, db_syllabus_to_pydantic, delete_syllabus, update_assignment_status, get_assignment_by_id
+from db_helpers import get_db_session, upsert_syllabus, upsert_syllabi, get_all_syllabi, db_syllabus_to_pydantic, delete_syllabus, update_assignment_status, get_assignment_by_id
 from database import SyllabusDB
 
+# Read uploads in 1 MiB chunks so a request never holds a whole PDF in memory
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Cache of extraction results, keyed by model, prompt version and PDF content
+extraction_cache = ExtractionCache()
+
+# Worker threads for Gemini extractions, which block on network I/O for seconds at a time
+EXTRACTION_WORKERS = max(2, os.cpu_count() or 1)
+
 # Response models
 class AnalysisResponse(BaseModel):
     """Response model for PDF analysis."""
@@ -42,11 +57,50 @@ class DatabaseResponse(BaseModel):
     syllabus_id: Optional[int] = None
     error: Optional[str] = None
 
-# Initialize FastAPI app
+class AnalyzeAndSaveResponse(BaseModel):
+    """Response model for combined analysis and database operations."""
+    analysis: AnalysisResponse
+    database: DatabaseResponse
+
+class BatchFileResponse(BaseModel):
+    """Analysis and database results for one file of a batch upload."""
+    filename: Optional[str] = None
+    analysis: AnalysisResponse
+    database: DatabaseResponse
+
+class BatchResponse(BaseModel):
+    """Response model for batch analysis and database operations."""
+    results: List[BatchFileResponse]
+
+class SyllabiResponse(BaseModel):
+    """Response model for listing syllabi."""
+    success: bool
+    message: str
+    data: List[Syllabus]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the database schema and extraction workers at startup, and stop the workers on shutdown."""
+    create_tables()
+    # Created per lifespan so the app can be started again after a shutdown
+    app.state.extraction_executor = ThreadPoolExecutor(
+        max_workers=EXTRACTION_WORKERS,
+        thread_name_prefix="extract"
+    )
+    try:
+        yield
+    finally:
+        app.state.extraction_executor.shutdown(wait=False, cancel_futures=True)
+
+# Initialize FastAPI app.
+# Endpoints that only talk to the database are plain ``def`` functions so that
+# FastAPI runs their blocking SQLAlchemy calls in its threadpool instead of on
+# the event loop.
 app = FastAPI(
     title="Syllabus Analyzer API",
     description="API for analyzing PDF syllabi and extracting assignment information",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -68,16 +122,18 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "service": "syllabus-analyzer"}
 
-@app.post("/analyze-pdf", response_model=AnalysisResponse)
-async def analyze_pdf(file: UploadFile = File(...)):
+async def analyze_upload(file: UploadFile) -> Optional[Syllabus]:
     """
-    Upload and analyze a PDF syllabus file.
+    Extract syllabus data from an uploaded PDF, using the extraction cache when possible.
     
     Args:
-        file: The PDF file to analyze
+        file: The uploaded PDF file
         
     Returns:
-        AnalysisResponse with extracted syllabus data
+        The extracted Syllabus, or None if extraction failed
+        
+    Raises:
+        HTTPException: If the upload is not a PDF or cannot be processed
     """
     # Validate file type
     if not file.filename.lower().endswith('.pdf'):
@@ -86,49 +142,99 @@ async def analyze_pdf(file: UploadFile = File(...)):
             detail="File must be a PDF"
         )
     
-    # Check if GEMINI_API_KEY is available
-    if not os.getenv("GEMINI_API_KEY"):
-        raise HTTPException(
-            status_code=500,
-            detail="GEMINI_API_KEY environment variable not set"
-        )
-    
     try:
-        # Save uploaded file to temporary location
+        # Stream the upload to a temporary file, hashing it along the way
+        hasher = hashlib.sha256()
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            content = await file.read()
-            temp_file.write(content)
             temp_file_path = temp_file.name
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                temp_file.write(chunk)
+                hasher.update(chunk)
+        cache_key = ExtractionCache.make_key(hasher.hexdigest())
         
         try:
-            # Extract syllabus structure
-            syllabus_data = extract_syllabus_structure(temp_file_path)
+            # Return a previous result for identical PDF bytes without calling Gemini
+            try:
+                cached_data = await run_in_threadpool(extraction_cache.get, cache_key)
+            except OSError as e:
+                print(f"Warning: Extraction cache unavailable: {str(e)}")
+                cached_data = None
+            if cached_data is not None:
+                return cached_data
             
-            if syllabus_data is None:
-                return AnalysisResponse(
-                    success=False,
-                    message="Failed to extract syllabus data",
-                    error="PDF analysis failed"
+            # Check if GEMINI_API_KEY is available
+            if not os.getenv("GEMINI_API_KEY"):
+                raise HTTPException(
+                    status_code=500,
+                    detail="GEMINI_API_KEY environment variable not set"
                 )
             
-            return AnalysisResponse(
-                success=True,
-                message="Syllabus analyzed successfully",
-                data=syllabus_data
+            # Extract syllabus structure off the event loop
+            syllabus_data = await asyncio.get_running_loop().run_in_executor(
+                app.state.extraction_executor, extract_syllabus_structure, temp_file_path
             )
             
+            if syllabus_data is not None:
+                try:
+                    await run_in_threadpool(extraction_cache.put, cache_key, syllabus_data)
+                except OSError as e:
+                    print(f"Warning: Could not write extraction cache: {str(e)}")
+            
+            return syllabus_data
+            
         finally:
             # Clean up temporary file
             os.unlink(temp_file_path)
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing PDF: {str(e)}"
         )
 
+def save_syllabus(db: Session, syllabus_data: Syllabus) -> int:
+    """
+    Create or update a syllabus and return its database ID.
+    
+    Args:
+        db: An open database session
+        syllabus_data: The parsed Syllabus object
+        
+    Returns:
+        The ID of the saved syllabus
+    """
+    return upsert_syllabus(db, syllabus_data).id
+
+@app.post("/analyze-pdf", response_model=AnalysisResponse)
+async def analyze_pdf(file: UploadFile = File(...)):
+    """
+    Upload and analyze a PDF syllabus file.
+    
+    Args:
+        file: The PDF file to analyze
+        
+    Returns:
+        AnalysisResponse with extracted syllabus data
+    """
+    syllabus_data = await analyze_upload(file)
+    
+    if syllabus_data is None:
+        return AnalysisResponse(
+            success=False,
+            message="Failed to extract syllabus data",
+            error="PDF analysis failed"
+        )
+    
+    return AnalysisResponse(
+        success=True,
+        message="Syllabus analyzed successfully",
+        data=syllabus_data
+    )
+
 @app.post("/save-to-database", response_model=DatabaseResponse)
-async def save_to_database(syllabus_data: Syllabus):
+def save_to_database(syllabus_data: Syllabus):
     """
     Save extracted syllabus data to the database.
     
@@ -139,17 +245,14 @@ async def save_to_database(syllabus_data: Syllabus):
         DatabaseResponse with operation result
     """
     try:
-        # Ensure database tables exist
-        create_tables()
-        
         # Get database session and save data
         db = get_db_session()
         try:
-            db_syllabus = upsert_syllabus(db, syllabus_data)
+            syllabus_id = save_syllabus(db, syllabus_data)
             return DatabaseResponse(
                 success=True,
                 message="Syllabus saved to database successfully",
-                syllabus_id=db_syllabus.id
+                syllabus_id=syllabus_id
             )
         finally:
             db.close()
@@ -161,7 +264,7 @@ async def save_to_database(syllabus_data: Syllabus):
             error=str(e)
         )
 
-@app.post("/analyze-and-save", response_model=dict)
+@app.post("/analyze-and-save", response_model=AnalyzeAndSaveResponse)
 async def analyze_and_save(file: UploadFile = File(...)):
     """
     Analyze PDF and save to database in one operation.
@@ -173,27 +276,145 @@ async def analyze_and_save(file: UploadFile = File(...)):
         Combined response with analysis and database operation results
     """
     # First analyze the PDF
-    analysis_result = await analyze_pdf(file)
+    syllabus_data = await analyze_upload(file)
     
-    if not analysis_result.success:
+    if syllabus_data is None:
         return {
-            "analysis": analysis_result,
+            "analysis": AnalysisResponse(
+                success=False,
+                message="Failed to extract syllabus data",
+                error="PDF analysis failed"
+            ),
             "database": DatabaseResponse(
                 success=False,
                 message="Skipped database save due to analysis failure"
             )
         }
     
-    # If analysis succeeded, save to database
-    db_result = await save_to_database(analysis_result.data)
+    # If analysis succeeded, save in one session without blocking the event loop
+    def save() -> int:
+        with get_db_session() as db:
+            return save_syllabus(db, syllabus_data)
+    
+    try:
+        db_result = DatabaseResponse(
+            success=True,
+            message="Syllabus saved to database successfully",
+            syllabus_id=await run_in_threadpool(save)
+        )
+    except Exception as e:
+        db_result = DatabaseResponse(
+            success=False,
+            message="Failed to save syllabus to database",
+            error=str(e)
+        )
     
     return {
-        "analysis": analysis_result,
+        "analysis": AnalysisResponse(
+            success=True,
+            message="Syllabus analyzed successfully",
+            data=syllabus_data
+        ),
         "database": db_result
     }
 
-@app.get("/syllabi")
-async def get_syllabi():
+@app.post("/analyze-and-save-batch", response_model=BatchResponse)
+async def analyze_and_save_batch(files: List[UploadFile] = File(...)):
+    """
+    Analyze several PDFs concurrently and save all results to the database at once.
+    
+    Args:
+        files: The PDF files to analyze and save
+        
+    Returns:
+        Per-file analysis and database operation results, in upload order
+    """
+    # Analyze all PDFs concurrently; extractions run in the extraction executor
+    outcomes = await asyncio.gather(
+        *(analyze_upload(file) for file in files),
+        return_exceptions=True
+    )
+    
+    analysis_results = []
+    for outcome in outcomes:
+        if isinstance(outcome, Syllabus):
+            analysis_results.append(AnalysisResponse(
+                success=True,
+                message="Syllabus analyzed successfully",
+                data=outcome
+            ))
+        else:
+            if isinstance(outcome, HTTPException):
+                error = outcome.detail
+            elif isinstance(outcome, Exception):
+                error = str(outcome)
+            else:
+                error = "PDF analysis failed"
+            analysis_results.append(AnalysisResponse(
+                success=False,
+                message="Failed to extract syllabus data",
+                error=error
+            ))
+    
+    # Save every successful analysis in one session, upserting by ID like /analyze-and-save
+    analyzed = [result.data for result in analysis_results if result.success]
+    
+    def save_all() -> list:
+        """Return a syllabus ID or the raised exception for each analyzed syllabus."""
+        with get_db_session() as db:
+            try:
+                return upsert_syllabi(db, analyzed)
+            except Exception:
+                db.rollback()
+            
+            # The bulk insert failed; save each syllabus on its own so one bad
+            # file does not prevent the others from being stored
+            outcomes = []
+            for syllabus_data in analyzed:
+                try:
+                    outcomes.extend(upsert_syllabi(db, [syllabus_data]))
+                except Exception as e:
+                    db.rollback()
+                    outcomes.append(e)
+            return outcomes
+    
+    try:
+        save_outcomes = await run_in_threadpool(save_all)
+    except Exception as e:
+        save_outcomes = [e] * len(analyzed)
+    save_outcomes = iter(save_outcomes)
+    
+    results = []
+    for file, analysis_result in zip(files, analysis_results):
+        if not analysis_result.success:
+            db_result = DatabaseResponse(
+                success=False,
+                message="Skipped database save due to analysis failure"
+            )
+        else:
+            outcome = next(save_outcomes)
+            if isinstance(outcome, Exception):
+                db_result = DatabaseResponse(
+                    success=False,
+                    message="Failed to save syllabus to database",
+                    error=str(outcome)
+                )
+            else:
+                db_result = DatabaseResponse(
+                    success=True,
+                    message="Syllabus saved to database successfully",
+                    syllabus_id=outcome
+                )
+        results.append({
+            "filename": file.filename,
+            "analysis": analysis_result,
+            "database": db_result
+        })
+    
+    return {"results": results}
+
+@app.get("/syllabi", response_model=SyllabiResponse)
+def get_syllabi():
     """
     Get all syllabi from the database.
     
@@ -201,14 +422,9 @@ async def get_syllabi():
         List of all syllabi with their assignments
     """
     try:
-        # Ensure database tables exist
-        create_tables()
-        
-        # Get all syllabi from database
-        db_syllabi = get_all_syllabi_with_session()
-        
-        # Convert to Pydantic models
-        syllabi_data = [db_syllabus_to_pydantic(syllabus) for syllabus in db_syllabi]
+        # Load all syllabi and convert them to Pydantic models within one session
+        with get_db_session() as db:
+            syllabi_data = [db_syllabus_to_pydantic(syllabus) for syllabus in get_all_syllabi(db)]
         
         return {
             "success": True,
@@ -222,8 +438,8 @@ async def get_syllabi():
             detail=f"Error retrieving syllabi: {str(e)}"
         )
 
-@app.put("/syllabi/{syllabus_id}")
-async def update_syllabus(syllabus_id: int, syllabus_data: Syllabus):
+@app.put("/syllabi/{syllabus_id}", response_model=DatabaseResponse)
+def update_syllabus(syllabus_id: int, syllabus_data: Syllabus):
     """
     Update an existing syllabus in the database.
     
@@ -235,9 +451,6 @@ async def update_syllabus(syllabus_id: int, syllabus_data: Syllabus):
         DatabaseResponse with operation result
     """
     try:
-        # Ensure database tables exist
-        create_tables()
-        
         # Get database session and update data
         db = get_db_session()
         try:
@@ -249,13 +462,13 @@ async def update_syllabus(syllabus_id: int, syllabus_data: Syllabus):
                     detail=f"Syllabus with ID {syllabus_id} not found"
                 )
             
-            # Update the syllabus using upsert_syllabus
-            updated_syllabus = upsert_syllabus(db, syllabus_data)
+            # Update the syllabus using save_syllabus
+            updated_syllabus_id = save_syllabus(db, syllabus_data)
             
             return DatabaseResponse(
                 success=True,
                 message="Syllabus updated successfully",
-                syllabus_id=updated_syllabus.id
+                syllabus_id=updated_syllabus_id
             )
         finally:
             db.close()
@@ -269,8 +482,8 @@ async def update_syllabus(syllabus_id: int, syllabus_data: Syllabus):
             error=str(e)
         )
 
-@app.delete("/syllabi/{syllabus_id}")
-async def delete_syllabus_endpoint(syllabus_id: int):
+@app.delete("/syllabi/{syllabus_id}", response_model=DatabaseResponse)
+def delete_syllabus_endpoint(syllabus_id: int):
     """
     Delete a syllabus from the database.
     
@@ -281,9 +494,6 @@ async def delete_syllabus_endpoint(syllabus_id: int):
         DatabaseResponse with operation result
     """
     try:
-        # Ensure database tables exist
-        create_tables()
-        
         # Get database session and delete syllabus
         db = get_db_session()
         try:
@@ -320,8 +530,8 @@ async def delete_syllabus_endpoint(syllabus_id: int):
             error=str(e)
         )
 
-@app.put("/assignments/{assignment_id}/status")
-async def update_assignment_status_endpoint(assignment_id: int, status: str = Body(...)):
+@app.put("/assignments/{assignment_id}/status", response_model=DatabaseResponse)
+def update_assignment_status_endpoint(assignment_id: int, status: str = Body(...)):
     """
     Update the status of a specific assignment.
     
@@ -333,9 +543,6 @@ async def update_assignment_status_endpoint(assignment_id: int, status: str = Bo
         DatabaseResponse with operation result
     """
     try:
-        # Ensure database tables exist
-        create_tables()
-        
         # Get database session and update assignment status
         db = get_db_session()
         try:
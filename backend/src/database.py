@@ -3,10 +3,9 @@ Database models and configuration for the homework management system.
 Uses SQLAlchemy to define database tables based on Pydantic models.
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Date, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import create_engine, event, func, text, Column, Integer, String, Date, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime
+from sqlalchemy.orm import sessionmaker, relationship, scoped_session
 import os
 import enum
 
@@ -21,12 +20,36 @@ if "sqlite" in DATABASE_URL:
 # Create engine
 engine = create_engine(
     DATABASE_URL,
+    insertmanyvalues_page_size=1000,  # Rows per batch for bulk INSERT statements
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
 
+# SQLite connection tuning: WAL lets readers proceed while a write is in progress
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "cache_size=-65536",
+    "foreign_keys=ON",
+)
+
+if "sqlite" in DATABASE_URL:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Apply SQLITE_PRAGMAS to every new DBAPI connection."""
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Thread-local session registry for scripts and other non-request call sites.
+# Callers that open it with ScopedSession() call ScopedSession.remove() when done.
+ScopedSession = scoped_session(SessionLocal)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -41,10 +64,15 @@ class AssignmentStatus(enum.Enum):
 class AssignmentDB(Base):
     """SQLAlchemy model for assignments table."""
     __tablename__ = "assignments"
+    __table_args__ = (
+        # Composite indexes serve due date range scans and per-syllabus lookups without a sort
+        Index("ix_assign_syl_due", "syllabus_id", "due_date"),
+        Index("ix_assign_due_syl", "due_date", "syllabus_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
-    due_date = Column(Date, nullable=False, index=True)
+    due_date = Column(Date, nullable=False)
     due_time = Column(String(50), nullable=False)
     submission_link = Column(Text, nullable=False)
     status = Column(Enum(AssignmentStatus), nullable=False, default=AssignmentStatus.NOT_STARTED)
@@ -56,8 +84,8 @@ class AssignmentDB(Base):
     syllabus = relationship("SyllabusDB", back_populates="assignments")
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
 
 
 class SyllabusDB(Base):
@@ -72,13 +100,76 @@ class SyllabusDB(Base):
     assignments = relationship("AssignmentDB", back_populates="syllabus", cascade="all, delete-orphan")
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
+
+
+# Full-text index over assignment names and their syllabus' course code and class name.
+# The FTS rowid is the assignment ID; triggers keep it in sync with both tables.
+SEARCH_INDEX_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS assignments_fts
+    USING fts5(name, course_code, class_name)""",
+    """CREATE TRIGGER IF NOT EXISTS assignments_fts_insert AFTER INSERT ON assignments BEGIN
+        INSERT INTO assignments_fts(rowid, name, course_code, class_name)
+        SELECT new.id, new.name, s.course_code, s.class_name FROM syllabi s WHERE s.id = new.syllabus_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS assignments_fts_delete AFTER DELETE ON assignments BEGIN
+        DELETE FROM assignments_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS assignments_fts_update AFTER UPDATE OF name, syllabus_id ON assignments BEGIN
+        DELETE FROM assignments_fts WHERE rowid = old.id;
+        INSERT INTO assignments_fts(rowid, name, course_code, class_name)
+        SELECT new.id, new.name, s.course_code, s.class_name FROM syllabi s WHERE s.id = new.syllabus_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS syllabi_fts_update AFTER UPDATE OF course_code, class_name ON syllabi BEGIN
+        UPDATE assignments_fts SET course_code = new.course_code, class_name = new.class_name
+        WHERE rowid IN (SELECT id FROM assignments WHERE syllabus_id = new.id);
+    END""",
+)
+
+
+def create_search_index(connection):
+    """Create the assignments FTS5 index and its triggers, and index any assignments it is missing."""
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+    
+    # Backfill rows that predate the triggers; a no-op once the index is complete
+    connection.execute(text(
+        """INSERT INTO assignments_fts(rowid, name, course_code, class_name)
+        SELECT a.id, a.name, s.course_code, s.class_name
+        FROM assignments a JOIN syllabi s ON s.id = a.syllabus_id
+        WHERE a.id NOT IN (SELECT rowid FROM assignments_fts)"""
+    ))
+
+
+# Indexes superseded by later schema changes, dropped from existing databases
+LEGACY_INDEXES = (
+    "ix_assignments_due_date",  # covered by ix_assign_due_syl
+)
 
 
 def create_tables():
-    """Create all database tables."""
-    Base.metadata.create_all(bind=engine)
+    """Create all database tables and bring indexes on existing tables up to date."""
+    with engine.connect() as connection:
+        if "sqlite" in DATABASE_URL:
+            # Take the write lock before checking the schema, so that several workers
+            # starting against the same database apply these steps one at a time
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        
+        Base.metadata.create_all(bind=connection)
+        
+        # create_all skips tables that already exist, so add any indexes they are missing
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+        
+        for index_name in LEGACY_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        
+        if "sqlite" in DATABASE_URL:
+            create_search_index(connection)
+        
+        connection.commit()
 
 
 def get_db():
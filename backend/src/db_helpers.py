@@ -3,94 +3,139 @@ Database helper methods for CRUD operations.
 Provides functions to convert between Pydantic models and SQLAlchemy models.
 """
 
+from contextlib import contextmanager
+from functools import lru_cache
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from datetime import date
+from sqlalchemy import bindparam, insert, lambda_stmt, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, selectinload
+from datetime import date, timedelta
 
-from database import AssignmentDB, SyllabusDB, get_db_session
+from database import AssignmentDB, AssignmentStatus, ScopedSession, SyllabusDB, get_db_session
 
 # Set up shared paths
 from path_utils import setup_shared_paths
 setup_shared_paths()
-from custom_types import Assignment, Syllabus, AssignmentData
+from custom_types import Syllabus, AssignmentData
+
+
+def _assignment_rows(syllabus_id: int, syllabus_data: Syllabus) -> List[dict]:
+    """Build parameter rows for a bulk INSERT of a syllabus' assignments."""
+    return [
+        {
+            "name": assignment.name,
+            "due_date": assignment.due_date,
+            "due_time": assignment.due_time,
+            "submission_link": assignment.submission_link,
+            "status": assignment.status,
+            "syllabus_id": syllabus_id,
+        }
+        for assignment in syllabus_data.assignments
+    ]
+
+
+def _replace_assignments(db: Session, syllabus_ids: List[int], syllabi: List[Syllabus]) -> None:
+    """Replace all assignments of the given syllabi with one DELETE and one bulk INSERT."""
+    # If an ID appears more than once, its last syllabus wins, as with sequential upserts
+    latest = dict(zip(syllabus_ids, syllabi))
+    
+    db.query(AssignmentDB).filter(AssignmentDB.syllabus_id.in_(latest)).delete(synchronize_session=False)
+    
+    rows = [
+        row
+        for syllabus_id, syllabus_data in latest.items()
+        for row in _assignment_rows(syllabus_id, syllabus_data)
+    ]
+    if rows:
+        db.execute(insert(AssignmentDB), rows)
+
+
+def _upsert_syllabus_rows(db: Session, syllabi: List[Syllabus]) -> List[int]:
+    """
+    Write syllabus rows with INSERT ... ON CONFLICT (id) DO UPDATE.
+    
+    An ID that does not exist in the database resolves to NULL, so a new
+    syllabus gets a fresh ID rather than the one sent by the client.
+    
+    Returns the syllabus IDs in the same order as the input.
+    """
+    existing_id = select(SyllabusDB.id).where(SyllabusDB.id == bindparam("client_id")).scalar_subquery()
+    stmt = sqlite_insert(SyllabusDB).values(
+        id=existing_id,
+        class_name=bindparam("class_name"),
+        course_code=bindparam("course_code")
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SyllabusDB.id],
+        set_={
+            "class_name": stmt.excluded.class_name,
+            "course_code": stmt.excluded.course_code,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    ).returning(SyllabusDB.id, sort_by_parameter_order=True)
+    
+    rows = [
+        {
+            "client_id": syllabus_data.id,
+            "class_name": syllabus_data.class_name,
+            "course_code": syllabus_data.course_code,
+        }
+        for syllabus_data in syllabi
+    ]
+    return list(db.scalars(stmt, rows).all())
 
 
 def upsert_syllabus(db: Session, syllabus_data: Syllabus) -> SyllabusDB:
-    """Create or update a syllabus in the database based on ID."""
-    from sqlalchemy.orm import joinedload
+    """
+    Create or update a syllabus in the database based on ID.
     
-    # Check if syllabus with this ID already exists
-    existing_syllabus = db.query(SyllabusDB).options(joinedload(SyllabusDB.assignments)).filter(
-        SyllabusDB.id == syllabus_data.id
-    ).first()
+    The syllabus row is written with a single INSERT ... ON CONFLICT (id) DO
+    UPDATE statement and its assignments are replaced with one DELETE and one
+    bulk INSERT.
+    """
+    syllabus_ids = _upsert_syllabus_rows(db, [syllabus_data])
+    _replace_assignments(db, syllabus_ids, [syllabus_data])
     
-    if existing_syllabus:
-        # Update existing syllabus
-        existing_syllabus.class_name = syllabus_data.class_name
-        existing_syllabus.course_code = syllabus_data.course_code
-        
-        # Clear existing assignments
-        for assignment in existing_syllabus.assignments:
-            db.delete(assignment)
-        
-        # Add new assignments
-        for assignment in syllabus_data.assignments:
-            db_assignment = AssignmentDB(
-                name=assignment.name,
-                due_date=assignment.due_date,
-                due_time=assignment.due_time,
-                submission_link=assignment.submission_link,
-                status=assignment.status,
-                syllabus_id=existing_syllabus.id
-            )
-            db.add(db_assignment)
-        
-        db.commit()
-        db.refresh(existing_syllabus)
-        return existing_syllabus
-    else:
-        # Create new syllabus
-        db_syllabus = SyllabusDB(
-            class_name=syllabus_data.class_name,
-            course_code=syllabus_data.course_code
-        )
-        db.add(db_syllabus)
-        db.flush()  # Flush to get the ID
-        print("New syllabus ID: ", db_syllabus.id)
-        
-        # Create assignments
-        for assignment in syllabus_data.assignments:
-            db_assignment = AssignmentDB(
-                name=assignment.name,
-                due_date=assignment.due_date,
-                due_time=assignment.due_time,
-                submission_link=assignment.submission_link,
-                status=assignment.status,
-                syllabus_id=db_syllabus.id
-            )
-            db.add(db_assignment)
-        
-        db.commit()
-        db.refresh(db_syllabus)
-        return db_syllabus
+    db.commit()
+    return get_syllabus(db, syllabus_ids[0])
+
+
+def upsert_syllabi(db: Session, syllabi: List[Syllabus]) -> List[int]:
+    """
+    Create or update several syllabi based on ID in one transaction.
+    
+    Matches upsert_syllabus: existing IDs are updated in place and unknown IDs
+    create new syllabi. The syllabus rows are written with one batched upsert,
+    and all their assignments are replaced with one DELETE and one bulk INSERT.
+    
+    Returns the syllabus IDs in the same order as the input.
+    """
+    if not syllabi:
+        return []
+    
+    syllabus_ids = _upsert_syllabus_rows(db, syllabi)
+    _replace_assignments(db, syllabus_ids, syllabi)
+    
+    db.commit()
+    return syllabus_ids
 
 
 def get_syllabus(db: Session, syllabus_id: int) -> Optional[SyllabusDB]:
     """Get a syllabus by ID."""
-    from sqlalchemy.orm import joinedload
-    return db.query(SyllabusDB).options(joinedload(SyllabusDB.assignments)).filter(SyllabusDB.id == syllabus_id).first()
+    stmt = lambda_stmt(lambda: select(SyllabusDB).options(selectinload(SyllabusDB.assignments)).where(SyllabusDB.id == syllabus_id))
+    return db.scalars(stmt).first()
 
 
 def get_syllabus_by_course_code(db: Session, course_code: str) -> Optional[SyllabusDB]:
     """Get a syllabus by course code."""
-    from sqlalchemy.orm import joinedload
-    return db.query(SyllabusDB).options(joinedload(SyllabusDB.assignments)).filter(SyllabusDB.course_code == course_code).first()
+    stmt = lambda_stmt(lambda: select(SyllabusDB).options(selectinload(SyllabusDB.assignments)).where(SyllabusDB.course_code == course_code))
+    return db.scalars(stmt).first()
 
 
 def get_all_syllabi(db: Session) -> List[SyllabusDB]:
     """Get all syllabi."""
-    from sqlalchemy.orm import joinedload
-    return db.query(SyllabusDB).options(joinedload(SyllabusDB.assignments)).all()
+    stmt = lambda_stmt(lambda: select(SyllabusDB).options(selectinload(SyllabusDB.assignments)))
+    return db.scalars(stmt).all()
 
 
 def update_syllabus(db: Session, syllabus_id: int, syllabus_data: Syllabus) -> Optional[SyllabusDB]:
@@ -103,20 +148,8 @@ def update_syllabus(db: Session, syllabus_id: int, syllabus_data: Syllabus) -> O
     db_syllabus.class_name = syllabus_data.class_name
     db_syllabus.course_code = syllabus_data.course_code
     
-    # Delete existing assignments
-    db.query(AssignmentDB).filter(AssignmentDB.syllabus_id == syllabus_id).delete()
-    
-    # Add new assignments
-    for assignment in syllabus_data.assignments:
-        db_assignment = AssignmentDB(
-            name=assignment.name,
-            due_date=assignment.due_date,
-            due_time=assignment.due_time,
-            submission_link=assignment.submission_link,
-            status=assignment.status,
-            syllabus_id=syllabus_id
-        )
-        db.add(db_assignment)
+    # Replace existing assignments
+    _replace_assignments(db, [syllabus_id], [syllabus_data])
     
     db.commit()
     db.refresh(db_syllabus)
@@ -141,76 +174,95 @@ def get_assignments_by_syllabus(db: Session, syllabus_id: int) -> List[Assignmen
 
 def get_assignments_by_due_date(db: Session, due_date: date) -> List[AssignmentDB]:
     """Get all assignments due on a specific date."""
-    return db.query(AssignmentDB).filter(AssignmentDB.due_date == due_date).all()
+    stmt = lambda_stmt(lambda: select(AssignmentDB).where(AssignmentDB.due_date == due_date))
+    return db.scalars(stmt).all()
 
 
 def get_upcoming_assignments(db: Session, days_ahead: int = 7) -> List[AssignmentDB]:
     """Get assignments due within the next N days."""
-    from datetime import date, timedelta
-    end_date = date.today() + timedelta(days=days_ahead)
-    return db.query(AssignmentDB).filter(
-        AssignmentDB.due_date >= date.today(),
+    # Dates must be closure variables so the cached statement binds fresh values per call
+    start_date = date.today()
+    end_date = start_date + timedelta(days=days_ahead)
+    stmt = lambda_stmt(lambda: select(AssignmentDB).where(
+        AssignmentDB.due_date >= start_date,
         AssignmentDB.due_date <= end_date
-    ).order_by(AssignmentDB.due_date).all()
+    ).order_by(AssignmentDB.due_date))
+    return db.scalars(stmt).all()
+
+
+# Assignment columns copied into Pydantic models; also forms part of the conversion cache key
+_ASSIGNMENT_FIELDS = ("id", "name", "due_date", "due_time", "submission_link", "status")
+
+
+@lru_cache(maxsize=1024)
+def _convert_syllabus(model, syllabus_id, updated_at, class_name, course_code, assignments):
+    """Build a Pydantic syllabus model from hashable column values, memoized per exact row state."""
+    return model.model_validate({
+        "id": syllabus_id,
+        "class_name": class_name,
+        "course_code": course_code,
+        "assignments": [dict(zip(_ASSIGNMENT_FIELDS, assignment)) for assignment in assignments],
+    })
+
+
+def _convert_db_syllabus(model, db_syllabus: SyllabusDB):
+    """Convert a SyllabusDB row through the memoized converter."""
+    assignments = tuple(
+        tuple(getattr(db_assignment, field) for field in _ASSIGNMENT_FIELDS)
+        for db_assignment in db_syllabus.assignments
+    )
+    return _convert_syllabus(
+        model,
+        db_syllabus.id,
+        db_syllabus.updated_at,
+        db_syllabus.class_name,
+        db_syllabus.course_code,
+        assignments
+    )
 
 
 def db_syllabus_to_pydantic(db_syllabus: SyllabusDB) -> Syllabus:
-    """Convert SQLAlchemy SyllabusDB to Pydantic Syllabus."""
-    assignments = []
-    for db_assignment in db_syllabus.assignments:
-        assignment = Assignment(
-            id=db_assignment.id,
-            name=db_assignment.name,
-            due_date=db_assignment.due_date,
-            due_time=db_assignment.due_time,
-            submission_link=db_assignment.submission_link,
-            status=db_assignment.status
-        )
-        assignments.append(assignment)
+    """
+    Convert SQLAlchemy SyllabusDB to Pydantic Syllabus.
     
-    return Syllabus(
-        id=db_syllabus.id,
-        class_name=db_syllabus.class_name,
-        course_code=db_syllabus.course_code,
-        assignments=assignments
-    )
+    Results are cached, so repeated conversions of an unchanged syllabus return
+    the same instance; callers must not mutate it.
+    """
+    return _convert_db_syllabus(Syllabus, db_syllabus)
 
 
 def db_syllabus_to_assignment_data(db_syllabus: SyllabusDB) -> AssignmentData:
-    """Convert SQLAlchemy SyllabusDB to Pydantic AssignmentData."""
-    assignments = []
-    for db_assignment in db_syllabus.assignments:
-        assignment = Assignment(
-            id=db_assignment.id,
-            name=db_assignment.name,
-            due_date=db_assignment.due_date,
-            due_time=db_assignment.due_time,
-            submission_link=db_assignment.submission_link,
-            status=db_assignment.status
-        )
-        assignments.append(assignment)
+    """
+    Convert SQLAlchemy SyllabusDB to Pydantic AssignmentData.
     
-    return AssignmentData(
-        id=db_syllabus.id,
-        class_name=db_syllabus.class_name,
-        course_code=db_syllabus.course_code,
-        assignments=assignments
-    )
+    Results are cached, so repeated conversions of an unchanged syllabus return
+    the same instance; callers must not mutate it.
+    """
+    return _convert_db_syllabus(AssignmentData, db_syllabus)
+
+
+def _fts_match_expression(query: str) -> str:
+    """Turn free-form user input into an FTS5 expression of quoted prefix terms."""
+    terms = query.split()
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
 
 
 def search_assignments(db: Session, query: str) -> List[AssignmentDB]:
-    """Search assignments by name or course code."""
-    return db.query(AssignmentDB).join(SyllabusDB).filter(
-        (AssignmentDB.name.ilike(f"%{query}%")) |
-        (SyllabusDB.course_code.ilike(f"%{query}%")) |
-        (SyllabusDB.class_name.ilike(f"%{query}%"))
-    ).all()
+    """Search assignments by name, course code, or class name using the FTS5 index."""
+    match = _fts_match_expression(query)
+    if not match:
+        return db.query(AssignmentDB).all()
+    
+    stmt = select(AssignmentDB).from_statement(text(
+        "SELECT assignments.* FROM assignments "
+        "JOIN assignments_fts ON assignments_fts.rowid = assignments.id "
+        "WHERE assignments_fts MATCH :match ORDER BY assignments_fts.rank"
+    ))
+    return db.scalars(stmt, {"match": match}).all()
 
 
 def update_assignment_status(db: Session, assignment_id: int, status: str) -> Optional[AssignmentDB]:
     """Update the status of a specific assignment."""
-    from database import AssignmentStatus
-    
     # Convert string status to enum
     try:
         status_enum = AssignmentStatus(status)
@@ -232,26 +284,38 @@ def get_assignment_by_id(db: Session, assignment_id: int) -> Optional[Assignment
     return db.query(AssignmentDB).filter(AssignmentDB.id == assignment_id).first()
 
 
+@contextmanager
+def _thread_session():
+    """
+    Yield the calling thread's scoped session.
+    
+    A session the caller already opened with ScopedSession() is reused and left
+    open for the caller to remove. Otherwise the session is created here and
+    removed on exit; results loaded in it stay usable as detached objects.
+    """
+    owned = not ScopedSession.registry.has()
+    db = ScopedSession()
+    try:
+        yield db
+    finally:
+        if owned:
+            ScopedSession.remove()
+
+
 # Convenience functions that handle database sessions
 def create_syllabus_with_session(syllabus_data: Syllabus) -> SyllabusDB:
     """Create or update a syllabus with automatic session management."""
-    with get_db_session() as db:
+    with _thread_session() as db:
         return upsert_syllabus(db, syllabus_data)
 
 
 def get_all_syllabi_with_session() -> List[SyllabusDB]:
     """Get all syllabi with automatic session management."""
-    db = get_db_session()
-    try:
+    with _thread_session() as db:
         return get_all_syllabi(db)
-    finally:
-        db.close()
 
 
 def get_syllabus_by_course_code_with_session(course_code: str) -> Optional[SyllabusDB]:
     """Get syllabus by course code with automatic session management."""
-    db = get_db_session()
-    try:
+    with _thread_session() as db:
         return get_syllabus_by_course_code(db, course_code)
-    finally:
-        db.close()
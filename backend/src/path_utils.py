@@ -4,31 +4,46 @@ Path utilities for setting up Python module paths.
 Handles shared directory path detection for both development and Docker environments.
 """
 
+import os
 import sys
-from pathlib import Path
+from functools import lru_cache
 
 
-def setup_shared_paths():
+def _add_to_path(path: str) -> None:
+    """Prepend a directory to sys.path unless it is already there."""
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@lru_cache(maxsize=1)
+def setup_shared_paths() -> str:
     """
     Set up Python module paths for shared directory access.
     
     This function detects whether the code is running in a development environment
     or Docker container and adds the appropriate shared directory path to sys.path.
-    It also adds the current src directory to the path.
+    The result is cached, so only the first call touches the filesystem.
+    
+    Returns:
+        The shared directory path that was selected
     """
     # Detect environment and use appropriate path
-    shared_dev_path = Path(__file__).parent.parent.parent / "shared"
-    shared_docker_path = Path(__file__).parent.parent / "shared"
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    shared_dev_path = os.path.join(os.path.dirname(backend_dir), "shared")
+    shared_docker_path = os.path.join(backend_dir, "shared")
     
     # Check if we're running in development (shared folder exists 3 levels up)
     # or in Docker (shared folder exists 2 levels up)
-    if shared_dev_path.exists():
+    if os.path.isdir(shared_dev_path):
         # Development environment - shared folder is 3 levels up
-        sys.path.insert(0, str(shared_dev_path))
-    elif shared_docker_path.exists():
+        _add_to_path(shared_dev_path)
+        return shared_dev_path
+    elif os.path.isdir(shared_docker_path):
         # Docker environment - shared folder is 2 levels up
-        sys.path.insert(0, str(shared_docker_path))
+        _add_to_path(shared_docker_path)
+        return shared_docker_path
     else:
         # Fallback - try both paths
-        sys.path.insert(0, str(shared_dev_path))
-        sys.path.insert(0, str(shared_docker_path))
\ No newline at end of file
+        _add_to_path(shared_dev_path)
+        _add_to_path(shared_docker_path)
+        return shared_docker_path
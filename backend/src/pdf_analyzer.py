@@ -9,22 +9,26 @@ including class name, course code, and assignments with due dates.
 import os
 import sys
 import argparse
-import json
-from datetime import datetime
+import copy
+import hashlib
+import stat
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 try:
     from google import genai
     from dotenv import load_dotenv
-    import sys
-    from pathlib import Path
     
     # Set up shared paths
     from path_utils import setup_shared_paths
     setup_shared_paths()
     
     from custom_types import Syllabus
+    from pydantic import BaseModel, TypeAdapter, ValidationError
     
     # Import database functions
     from database import create_tables
@@ -37,39 +41,202 @@ except ImportError as e:
 # Load environment variables from .env file
 load_dotenv()
 
+# Gemini model used for extraction
+GEMINI_MODEL = "gemini-2.0-flash-exp"
+
+# Bump whenever the extraction prompt or schema changes so cached results are invalidated
+PROMPT_VERSION = "1"
+
+# JSON schema for Gemini structured output, generated once instead of on every request
+SYLLABUS_JSON_SCHEMA = Syllabus.model_json_schema()
+
+# Shared validator for Gemini's JSON responses, built once at import
+_SYLLABUS_ADAPTER = TypeAdapter(Syllabus)
+_SYLLABUS_JSON_VALIDATOR = _SYLLABUS_ADAPTER.validate_json
+
+# Gemini calls per extraction; invalid responses are retried with the validation error as feedback
+MAX_EXTRACTION_ATTEMPTS = 3
+
+# Provider name recorded in cache keys and entries
+PROVIDER = "google-genai"
+
+# Default directory for cached extraction results
+DEFAULT_CACHE_DIR = os.getenv("EXTRACT_CACHE_DIR", "./data/extract_cache")
+
+# Extraction prompt; {current_date} is filled in per request
+_EXTRACTION_PROMPT = """Extract the syllabus information from this document. 
+Focus on finding:
+1. The official class name
+2. The course code (e.g., CS 251, MATH 101)
+3. All assignments with their due dates, due times, and submission links
+
+For assignments, extract:
+- The full assignment name/title
+- The due date in YYYY-MM-DD format (e.g., 2025-09-06, 2025-10-15). If not specified or unclear, use a reasonable default date in proper YYYY-MM-DD format.
+- The due time (if not specified, use "11:59 PM" as default)
+- The submission link (if not specified, use "N/A" as default)
+
+IMPORTANT: All dates must be in YYYY-MM-DD format. Do not use MMDD-01-20 or any other format.
+
+Note: The current date is {current_date}. Any ambiguous year dates should be interpreted as the current year.
+
+Look for submission links in various formats like URLs, Canvas links, or references to submission platforms.
+"""
+
+
+@lru_cache(maxsize=1)
+def _genai_client() -> genai.Client:
+    """
+    Return the process-wide Gemini client, creating it on first use.
+    
+    Sharing one client lets repeated extractions reuse its HTTP connections.
+    """
+    return genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+
+def hash_pdf(pdf_path: str) -> str:
+    """Return the SHA-256 hex digest of a PDF file."""
+    with open(pdf_path, 'rb') as f:
+        # file_digest reads into one reusable buffer instead of allocating a bytes object per chunk
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class CacheEntry(BaseModel):
+    """A cached extraction result with the provenance it was produced under."""
+    created_at: datetime
+    provider: str
+    model: str
+    prompt_version: str
+    syllabus: Syllabus
+
+
+class ExtractionCache:
+    """
+    Content-addressable on-disk cache of extraction results.
+    
+    Entries are plain JSON files named by a key that covers the provider, model,
+    prompt version and PDF content, so a change to any of them is a cache miss.
+    """
+    
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+    
+    @staticmethod
+    def make_key(pdf_digest: str) -> str:
+        """
+        Build the cache key for a PDF.
+        
+        Args:
+            pdf_digest: SHA-256 hex digest of the PDF bytes
+            
+        Returns:
+            Hex digest over the length-prefixed provider, model, prompt version and PDF digest
+        """
+        hasher = hashlib.sha256()
+        for part in (PROVIDER, GEMINI_MODEL, PROMPT_VERSION, pdf_digest):
+            data = part.encode('utf-8')
+            # Length prefixes keep adjacent fields from running into each other
+            hasher.update(len(data).to_bytes(8, 'little'))
+            hasher.update(data)
+        return hasher.hexdigest()
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Syllabus]:
+        """
+        Look up a cached extraction result.
+        
+        Args:
+            key: Cache key from make_key
+            
+        Returns:
+            The cached Syllabus, or None on a miss. Entries that fail validation
+            are evicted.
+        """
+        path = self._path(key)
+        try:
+            return CacheEntry.model_validate_json(path.read_bytes()).syllabus
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            path.unlink(missing_ok=True)
+            return None
+    
+    def put(self, key: str, syllabus_data: Syllabus) -> None:
+        """
+        Store an extraction result.
+        
+        Args:
+            key: Cache key from make_key
+            syllabus_data: The extracted Syllabus
+        """
+        entry = CacheEntry(
+            created_at=datetime.now(timezone.utc),
+            provider=PROVIDER,
+            model=GEMINI_MODEL,
+            prompt_version=PROMPT_VERSION,
+            syllabus=syllabus_data
+        )
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        f = tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.tmp', delete=False)
+        try:
+            with f:
+                f.write(entry.model_dump_json().encode('utf-8'))
+            os.replace(f.name, self._path(key))
+        except BaseException:
+            # Don't leave a partial temporary file behind in the cache directory
+            Path(f.name).unlink(missing_ok=True)
+            raise
+
 
 def validate_pdf_file(file_path: str) -> bool:
     """Validate that the file exists and is a PDF."""
-    path = Path(file_path)
-    
-    if not path.exists():
+    # A single stat() covers both the existence and the regular-file checks
+    try:
+        mode = os.stat(file_path).st_mode
+    except OSError:
         print(f"Error: File '{file_path}' does not exist.")
         return False
     
-    if not path.is_file():
+    if not stat.S_ISREG(mode):
         print(f"Error: '{file_path}' is not a file.")
         return False
     
-    if path.suffix.lower() != '.pdf':
+    if not file_path.lower().endswith('.pdf'):
         print(f"Error: '{file_path}' is not a PDF file.")
         return False
     
     return True
 
 
-def extract_syllabus_structure(pdf_path: str) -> Optional[Syllabus]:
+def extract_syllabus_structure(pdf_path: str, cache: Optional[ExtractionCache] = None) -> Optional[Syllabus]:
     """
     Upload a PDF file and extract structured syllabus information.
     
     Args:
         pdf_path: Path to the PDF file
+        cache: Optional extraction cache consulted before calling Gemini
         
     Returns:
         Parsed Syllabus object or None if error occurred
     """
+    cache_key = None
+    if cache is not None:
+        try:
+            cache_key = ExtractionCache.make_key(hash_pdf(pdf_path))
+            cached_data = cache.get(cache_key)
+            if cached_data is not None:
+                print("Using cached extraction result.")
+                return cached_data
+        except OSError as e:
+            print(f"Warning: Extraction cache unavailable: {str(e)}")
+            cache_key = None
+    
     try:
-        # Initialize the Gemini client
-        client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        # Reuse the shared Gemini client
+        client = _genai_client()
         
         print(f"Uploading PDF file: {pdf_path}")
         
@@ -79,40 +246,45 @@ def extract_syllabus_structure(pdf_path: str) -> Optional[Syllabus]:
         print("File uploaded successfully!")
         print(f"File ID: {uploaded_file.name}")
         
-        # Create the extraction prompt
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        prompt = f"""Extract the syllabus information from this document. 
-Focus on finding:
-1. The official class name
-2. The course code (e.g., CS 251, MATH 101)
-3. All assignments with their due dates, due times, and submission links
-
-For assignments, extract:
-- The full assignment name/title
-- The due date in YYYY-MM-DD format (e.g., 2025-09-06, 2025-10-15). If not specified or unclear, use a reasonable default date in proper YYYY-MM-DD format.
-- The due time (if not specified, use "11:59 PM" as default)
-- The submission link (if not specified, use "N/A" as default)
-
-IMPORTANT: All dates must be in YYYY-MM-DD format. Do not use MMDD-01-20 or any other format.
-
-Note: The current date is {current_date}. Any ambiguous year dates should be interpreted as the current year.
-
-Look for submission links in various formats like URLs, Canvas links, or references to submission platforms.
-"""
+        # Fill in today's date so the model can resolve year-less dates
+        prompt = _EXTRACTION_PROMPT.format(current_date=datetime.now().strftime("%Y-%m-%d"))
         
         print("Extracting structured syllabus data...")
         
-        response = client.models.generate_content(
-            model="gemini-2.0-flash-exp",
-            contents=[prompt, uploaded_file],
-            config={
-                "response_mime_type": "application/json",
-                "response_schema": Syllabus,
-            }
-        )
+        contents = [prompt, uploaded_file]
+        for attempt in range(MAX_EXTRACTION_ATTEMPTS):
+            response = client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=contents,
+                config={
+                    "response_mime_type": "application/json",
+                    # The SDK rewrites schema dicts in place, so pass it a copy
+                    "response_schema": copy.deepcopy(SYLLABUS_JSON_SCHEMA),
+                }
+            )
+            
+            # Parse the response into Pydantic objects
+            try:
+                syllabus_data = _SYLLABUS_JSON_VALIDATOR(response.text)
+                break
+            except ValidationError as e:
+                if attempt == MAX_EXTRACTION_ATTEMPTS - 1:
+                    raise
+                print(f"Attempt {attempt + 1} returned invalid data, retrying with feedback...")
+                # Reuse the uploaded file and tell the model what was wrong
+                contents = [
+                    prompt,
+                    uploaded_file,
+                    f"Your previous output had error: {e}. Fix and retry, returning only valid JSON matching the schema."
+                ]
+                time.sleep(1.0 * (attempt + 1))
+        
+        if cache_key is not None:
+            try:
+                cache.put(cache_key, syllabus_data)
+            except OSError as e:
+                print(f"Warning: Could not write extraction cache: {str(e)}")
         
-        # Parse the response into Pydantic objects
-        syllabus_data: Syllabus = response.parsed
         return syllabus_data
         
     except Exception as e:
@@ -151,6 +323,30 @@ def push_to_database(syllabus_data: Syllabus) -> bool:
         return False
 
 
+def format_syllabus_report(syllabus_data: Syllabus) -> str:
+    """
+    Format the syllabus summary and assignment list as plain text.
+    
+    Args:
+        syllabus_data: The parsed Syllabus object
+        
+    Returns:
+        Newline-terminated report shared by the console and text file output
+    """
+    lines = [
+        f"Class Name: {syllabus_data.class_name}",
+        f"Course Code: {syllabus_data.course_code}",
+        f"Number of Assignments: {len(syllabus_data.assignments)}",
+        "",
+        "Assignments:",
+    ]
+    for i, assignment in enumerate(syllabus_data.assignments, 1):
+        lines.append(f"  {i}. {assignment.name}")
+        lines.append(f"     Due: {assignment.due_date} at {assignment.due_time}")
+        lines.append(f"     Submission: {assignment.submission_link}")
+    return "\n".join(lines) + "\n"
+
+
 def main():
     """Main function to handle command line arguments and execute syllabus extraction."""
     parser = argparse.ArgumentParser(
@@ -176,6 +372,18 @@ Examples:
         help="Optional output file to save the structured data (JSON or text format)"
     )
     
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for cached extraction results (default: {DEFAULT_CACHE_DIR})"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call Gemini, ignoring and not updating the extraction cache"
+    )
+    
     parser.add_argument(
         "--push-to-db",
         action="store_true",
@@ -190,25 +398,21 @@ Examples:
     
     # Perform structured extraction
     print("Starting structured syllabus extraction...")
-    syllabus_data = extract_syllabus_structure(args.pdf_file)
+    cache = None if args.no_cache else ExtractionCache(args.cache_dir)
+    syllabus_data = extract_syllabus_structure(args.pdf_file, cache)
     
     if syllabus_data is None:
         print("Syllabus extraction failed.")
         sys.exit(1)
     
-    # Display structured results
-    print("\n" + "="*60)
-    print("STRUCTURED SYLLABUS DATA")
-    print("="*60)
-    print(f"Class Name: {syllabus_data.class_name}")
-    print(f"Course Code: {syllabus_data.course_code}")
-    print(f"Number of Assignments: {len(syllabus_data.assignments)}")
-    print("\nAssignments:")
-    for i, assignment in enumerate(syllabus_data.assignments, 1):
-        print(f"  {i}. {assignment.name}")
-        print(f"     Due: {assignment.due_date} at {assignment.due_time}")
-        print(f"     Submission: {assignment.submission_link}")
-    print("="*60)
+    # Display structured results in a single write
+    sys.stdout.write(
+        "\n" + "="*60 + "\n"
+        + "STRUCTURED SYLLABUS DATA\n"
+        + "="*60 + "\n"
+        + format_syllabus_report(syllabus_data)
+        + "="*60 + "\n"
+    )
     
     # Push to database if requested
     if args.push_to_db:
@@ -221,22 +425,16 @@ Examples:
     if args.output:
         try:
             if args.output.endswith('.json'):
-                # Save as JSON
-                with open(args.output, 'w', encoding='utf-8') as f:
-                    json.dump(syllabus_data.model_dump(), f, indent=2, default=str)
+                # Save as JSON, serialized directly by pydantic-core
+                Path(args.output).write_bytes(syllabus_data.model_dump_json(indent=2).encode('utf-8'))
             else:
                 # Save as formatted text
-                with open(args.output, 'w', encoding='utf-8') as f:
-                    f.write(f"Structured Syllabus Data for: {args.pdf_file}\n")
-                    f.write("="*60 + "\n")
-                    f.write(f"Class Name: {syllabus_data.class_name}\n")
-                    f.write(f"Course Code: {syllabus_data.course_code}\n")
-                    f.write(f"Number of Assignments: {len(syllabus_data.assignments)}\n\n")
-                    f.write("Assignments:\n")
-                    for i, assignment in enumerate(syllabus_data.assignments, 1):
-                        f.write(f"  {i}. {assignment.name}\n")
-                        f.write(f"     Due: {assignment.due_date} at {assignment.due_time}\n")
-                        f.write(f"     Submission: {assignment.submission_link}\n")
+                with open(args.output, 'w', encoding='utf-8', buffering=64 * 1024) as f:
+                    f.write(
+                        f"Structured Syllabus Data for: {args.pdf_file}\n"
+                        + "="*60 + "\n"
+                        + format_syllabus_report(syllabus_data)
+                    )
             print(f"\nStructured data saved to: {args.output}")
         except Exception as e:
             print(f"Error saving to output file: {str(e)}")
@@ -3,9 +3,8 @@ Shared data models for the homework management system.
 These models define the structure of assignment and syllabus data.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import date
-from typing import List
 from enum import Enum
 
 
@@ -18,6 +17,8 @@ class AssignmentStatus(str, Enum):
 
 class Assignment(BaseModel):
     """Represents a single assignment with all its details."""
+    model_config = ConfigDict(frozen=True)
+
     id: int = Field(..., description="The unique identifier of the assignment in the database.")
     name: str = Field(..., description="The full title or name of the assignment.")
     due_date: date = Field(..., description="The assignment's due date. Must be a valid date.")
@@ -31,12 +32,8 @@ class Syllabus(BaseModel):
     id: int = Field(..., description="The unique identifier of the syllabus in the database.")
     class_name: str = Field(..., description="The official name of the class.")
     course_code: str = Field(..., description="The official course code of the class.")
-    assignments: List[Assignment] = Field(..., description="A comprehensive list of all assignments found in the syllabus.")
+    assignments: list[Assignment] = Field(..., description="A comprehensive list of all assignments found in the syllabus.")
 
 
-class AssignmentData(BaseModel):
-    """Alternative name for Syllabus to match frontend naming conventions."""
-    id: int = Field(..., description="The unique identifier of the syllabus in the database.")
-    class_name: str = Field(..., description="The official name of the class.")
-    course_code: str = Field(..., description="The official course code of the class.")
-    assignments: List[Assignment] = Field(..., description="A comprehensive list of all assignments found in the syllabus.")
+# Alternative name for Syllabus to match frontend naming conventions
+AssignmentData = Syllabus